@@ -2,6 +2,7 @@
 Demo scenarios for event generation with predefined configurations
 """
 
+from functools import lru_cache
 from typing import Dict, Any
 from config import GenerationConfig
 
@@ -11,7 +12,19 @@ class DemoScenarios:
     @staticmethod
     def get_scenario(scenario_name: str) -> GenerationConfig:
         """Get a predefined scenario configuration"""
-        scenarios = {
+        scenarios = DemoScenarios.get_scenarios()
+        scenario = scenarios.get(scenario_name)
+        if not scenario:
+            available = list(scenarios.keys())
+            raise ValueError(f"Unknown scenario: {scenario_name}. Available: {available}")
+        
+        return scenario
+    
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_scenarios() -> Dict[str, GenerationConfig]:
+        """Build the runnable scenario configurations once and reuse them"""
+        return {
             "light_demo": DemoScenarios.light_demo(),
             "moderate_load": DemoScenarios.moderate_load(),
             "heavy_load": DemoScenarios.heavy_load(),
@@ -20,13 +33,6 @@ class DemoScenarios:
             "stress_test": DemoScenarios.stress_test(),
             "quick_sample": DemoScenarios.quick_sample()
         }
-        
-        scenario = scenarios.get(scenario_name)
-        if not scenario:
-            available = list(scenarios.keys())
-            raise ValueError(f"Unknown scenario: {scenario_name}. Available: {available}")
-        
-        return scenario
     
     @staticmethod
     def light_demo() -> GenerationConfig:
@@ -129,6 +135,7 @@ class DemoScenarios:
         )
     
     @staticmethod
+    @lru_cache(maxsize=1)
     def get_all_scenarios() -> Dict[str, Dict[str, Any]]:
         """Get all available scenarios with descriptions"""
         return {
@@ -1,13 +1,20 @@
 import os
-import json
 import asyncio
+import itertools
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+import socket
+import time
+from collections import deque
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, Any, Optional
 from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 import random
-from google.cloud import pubsub_v1
+import orjson
 import uuid
 from config import GenerationConfig
 from demo_scenarios import DemoScenarios
@@ -20,185 +27,379 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Event Generator Service",
     description="Generates sample events for real-time data pipeline demonstration",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Lazy Pub/Sub publisher - will be initialized when needed
 publisher = None
 
+# Naive datetimes in events are UTC; orjson renders them as ISO 8601 with a "Z" suffix
+EVENT_JSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+class EventJSONResponse(ORJSONResponse):
+    """JSON response that renders event timestamps the same way they are published
+
+    Return it directly from a handler so raw datetimes reach orjson instead of
+    being pre-encoded by FastAPI.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=EVENT_JSON_OPTIONS)
+
+# Client-side batching so publishes are pipelined instead of one RPC per event
+PUBLISH_BATCH_SETTINGS = {
+    "max_messages": 100,
+    "max_bytes": 1_000_000,
+    "max_latency": 0.05,
+}
+
+# C-level helpers bound once for the per-event path; _utc_from_epoch builds a
+# naive UTC datetime in one call, cheaper than utcnow() - timedelta(...)
+_utc_from_epoch = datetime.utcfromtimestamp
+_inet_ntoa = socket.inet_ntoa
+
 # Global state for background tasks
 generation_tasks = {}
 
+# Per-task stop signals, kept apart from generation_tasks so task status stays JSON-serializable
+generation_stop_events: Dict[str, asyncio.Event] = {}
+
+# Event generation is CPU-bound, run it off the event loop so HTTP handlers stay responsive
+_gen_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="event-gen")
+
+# Scenario catalog is static, build it once at import
+_SCENARIO_CACHE = DemoScenarios.get_all_scenarios()
+
 def get_publisher():
-    """Get or create Pub/Sub publisher client"""
+    """Get or create Pub/Sub publisher client
+
+    The google-cloud-pubsub import (gRPC, protobuf, auth) is deferred to here
+    so cold starts and the health endpoints don't pay for it.
+    """
     global publisher
     if publisher is None:
         try:
-            publisher = pubsub_v1.PublisherClient()
+            from google.cloud import pubsub_v1
+            publisher = pubsub_v1.PublisherClient(
+                batch_settings=pubsub_v1.types.BatchSettings(**PUBLISH_BATCH_SETTINGS)
+            )
             logger.info("Pub/Sub publisher client initialized")
         except Exception as e:
             logger.error(f"Failed to initialize Pub/Sub client: {e}")
             raise
     return publisher
 
+# Sample data for realistic generation, shared by all generator instances
+_CUSTOMERS = tuple(f"customer-{i:03d}" for i in range(1, 101))
+_PRODUCTS = (
+    {"id": "prod-001", "name": "Laptop Computer", "price": 999.99, "category": "electronics"},
+    {"id": "prod-002", "name": "Wireless Headphones", "price": 129.99, "category": "electronics"},
+    {"id": "prod-003", "name": "Coffee Maker", "price": 79.99, "category": "appliances"},
+    {"id": "prod-004", "name": "Running Shoes", "price": 89.99, "category": "footwear"},
+    {"id": "prod-005", "name": "Smartphone", "price": 699.99, "category": "electronics"},
+    {"id": "prod-006", "name": "Desk Chair", "price": 199.99, "category": "furniture"},
+    {"id": "prod-007", "name": "Water Bottle", "price": 24.99, "category": "lifestyle"},
+    {"id": "prod-008", "name": "Gaming Mouse", "price": 59.99, "category": "electronics"},
+    {"id": "prod-009", "name": "Yoga Mat", "price": 39.99, "category": "fitness"},
+    {"id": "prod-010", "name": "Backpack", "price": 49.99, "category": "accessories"}
+)
+_WAREHOUSES = ("wh-us-east", "wh-us-west", "wh-us-central", "wh-eu-west", "wh-asia-pacific")
+_CITIES = ("New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Philadelphia", "San Antonio", "San Diego", "Dallas", "San Jose")
+_COUNTRIES = ("US", "CA", "UK", "DE", "FR", "AU", "JP")
+_USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 14_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Android 11; Mobile; rv:89.0) Gecko/89.0 Firefox/89.0"
+)
+_PLATFORMS = ("web", "mobile", "tablet")
+_ACTIVITY_TYPES = ("login", "logout", "view_product", "add_to_cart", "remove_from_cart")
+_ORDER_STATUSES = ("pending", "processing", "shipped", "delivered")
+_INVENTORY_REASONS = ("restock", "sale", "return", "damage")
+_STREETS = ("Main", "Oak", "Pine", "Maple", "Cedar")
+
+# Index-based views of the product catalog for sampling
+_PRODUCT_IDS = tuple(p["id"] for p in _PRODUCTS)
+_PRODUCT_INDEXES = range(len(_PRODUCTS))
+
+_PRODUCT_PRICES = tuple(p["price"] for p in _PRODUCTS)
+
+# Pre-built order line items, copied per event with only the quantity filled in
+_PRODUCT_ITEM_TEMPLATES = tuple(
+    {"product_id": p["id"], "product_name": p["name"], "quantity": 0, "price": p["price"]}
+    for p in _PRODUCTS
+)
+
+# %-templates that render events straight to their published JSON, skipping the
+# dict and the encoder. Every string filled in is an id, timestamp, number or a
+# catalog value, none of which need JSON escaping (checked below).
+_ORDER_ITEM_JSON = tuple(
+    orjson.dumps(item).decode().replace('"quantity":0', '"quantity":%d')
+    for item in _PRODUCT_ITEM_TEMPLATES
+)
+_ORDER_JSON = (
+    '{"event_type":"order","order_id":"%s","customer_id":"%s","order_date":"%s","status":"%s",'
+    '"items":[%s],"shipping_address":{"street":"%s","city":"%s","country":"%s"},"total_amount":%r}'
+)
+_INVENTORY_JSON = (
+    '{"event_type":"inventory","inventory_id":"%s","product_id":"%s","warehouse_id":"%s",'
+    '"quantity_change":%d,"reason":"%s","timestamp":"%s"}'
+)
+_USER_ACTIVITY_JSON = (
+    '{"event_type":"user_activity","user_id":"%s","activity_type":"%s","ip_address":"%s",'
+    '"user_agent":"%s","timestamp":"%s","metadata":{"session_id":"%s","platform":"%s"}}'
+)
+
+def _is_json_safe(value: str) -> bool:
+    """True if value is printable ASCII that JSON-encodes to itself"""
+    return value.isascii() and value.isprintable() and '"' not in value and "\\" not in value and "%" not in value
+
+# Templates are only used when the catalog is template-safe; otherwise events go through orjson
+_TEMPLATES_SAFE = all(
+    _is_json_safe(value)
+    for values in (
+        _CUSTOMERS, _WAREHOUSES, _CITIES, _COUNTRIES, _USER_AGENTS, _PLATFORMS,
+        _ACTIVITY_TYPES, _ORDER_STATUSES, _INVENTORY_REASONS, _STREETS,
+        (v for p in _PRODUCTS for v in (p["id"], p["name"]))
+    )
+    for value in values
+)
+
+def _iso_utc(dt: datetime) -> str:
+    """Render a naive UTC datetime the way orjson does with EVENT_JSON_OPTIONS"""
+    return dt.isoformat() + "Z"
+
+TOPIC_ID = "backend-events-topic"
+
+@lru_cache(maxsize=None)
+def _topic_for(project_id: str) -> str:
+    """Fully qualified Pub/Sub topic path for a project"""
+    return f"projects/{project_id}/topics/{TOPIC_ID}"
+
 class EventGenerator:
     """Event generator with realistic data"""
     
     def __init__(self, project_id: str, environment: str = "dev"):
         self.project_id = project_id
         self.environment = environment
-        self.topic_path = get_publisher().topic_path(project_id, "backend-events-topic")
-        
-        # Sample data for realistic generation
-        self.customers = [f"customer-{i:03d}" for i in range(1, 101)]
-        self.products = [
-            {"id": "prod-001", "name": "Laptop Computer", "price": 999.99, "category": "electronics"},
-            {"id": "prod-002", "name": "Wireless Headphones", "price": 129.99, "category": "electronics"},
-            {"id": "prod-003", "name": "Coffee Maker", "price": 79.99, "category": "appliances"},
-            {"id": "prod-004", "name": "Running Shoes", "price": 89.99, "category": "footwear"},
-            {"id": "prod-005", "name": "Smartphone", "price": 699.99, "category": "electronics"},
-            {"id": "prod-006", "name": "Desk Chair", "price": 199.99, "category": "furniture"},
-            {"id": "prod-007", "name": "Water Bottle", "price": 24.99, "category": "lifestyle"},
-            {"id": "prod-008", "name": "Gaming Mouse", "price": 59.99, "category": "electronics"},
-            {"id": "prod-009", "name": "Yoga Mat", "price": 39.99, "category": "fitness"},
-            {"id": "prod-010", "name": "Backpack", "price": 49.99, "category": "accessories"}
-        ]
-        self.warehouses = ["wh-us-east", "wh-us-west", "wh-us-central", "wh-eu-west", "wh-asia-pacific"]
-        self.cities = ["New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Philadelphia", "San Antonio", "San Diego", "Dallas", "San Jose"]
-        self.countries = ["US", "CA", "UK", "DE", "FR", "AU", "JP"]
-        self.user_agents = [
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Mozilla/5.0 (iPhone; CPU iPhone OS 14_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Mobile/15E148 Safari/604.1",
-            "Mozilla/5.0 (Android 11; Mobile; rv:89.0) Gecko/89.0 Firefox/89.0"
-        ]
-        self.platforms = ["web", "mobile", "tablet"]
-        self.activity_types = ["login", "logout", "view_product", "add_to_cart", "remove_from_cart"]
-        self.order_statuses = ["pending", "processing", "shipped", "delivered"]
-        self.inventory_reasons = ["restock", "sale", "return", "damage"]
+        self.topic_path = _topic_for(project_id)
+        
+        # Per-generator RNG, avoids the shared module-level Random instance
+        self._rng = random.Random()
+        
+        # Event type dispatch tables, built once instead of on every generate_event call
+        self._generators = {
+            "order": self.generate_order_event,
+            "inventory": self.generate_inventory_event,
+            "user_activity": self.generate_user_activity_event
+        }
+        if _TEMPLATES_SAFE:
+            self._encoders = {
+                "order": self.generate_order_event_bytes,
+                "inventory": self.generate_inventory_event_bytes,
+                "user_activity": self.generate_user_activity_event_bytes
+            }
+        else:
+            self._encoders = {
+                event_type: lambda generate=generate: orjson.dumps(generate(), option=EVENT_JSON_OPTIONS)
+                for event_type, generate in self._generators.items()
+            }
     
-    def generate_order_event(self) -> Dict[str, Any]:
-        """Generate a realistic order event"""
-        customer_id = random.choice(self.customers)
-        order_id = f"ord-{uuid.uuid4().hex[:8]}"
+    def _short_id(self, n: int = 4) -> str:
+        """Random hex id of n bytes from the generator RNG (demo ids, no need for urandom)"""
+        return self._rng.getrandbits(n * 8).to_bytes(n, "big").hex()
+    
+    def _draw_order(self):
+        """Draw the variable fields of an order event"""
+        rng = self._rng
+        customer_id = _CUSTOMERS[rng.getrandbits(16) % len(_CUSTOMERS)]
+        order_id = f"ord-{self._short_id(4)}"
         
-        # Select 1-3 random products
-        num_items = random.randint(1, 3)
-        selected_products = random.sample(self.products, num_items)
+        # One 64-bit draw supplies all the small ints below, one byte each
+        r = rng.getrandbits(64)
         
-        items = []
-        total_amount = 0
-        
-        for product in selected_products:
-            quantity = random.randint(1, 3)
-            price = product["price"]
-            items.append({
-                "product_id": product["id"],
-                "product_name": product["name"],
-                "quantity": quantity,
-                "price": price
-            })
-            total_amount += price * quantity
+        # Select 1-3 random products, each with a quantity of 1-3
+        num_items = (r & 0xFF) % 3 + 1
+        idxs = rng.sample(_PRODUCT_INDEXES, num_items)
+        lines = [(idx, ((r >> (8 * (i + 1))) & 0xFF) % 3 + 1) for i, idx in enumerate(idxs)]
+        total_amount = round(sum(_PRODUCT_PRICES[idx] * qty for idx, qty in lines), 2)
+        
+        # Second draw for the shipping address picks
+        a = rng.getrandbits(24)
         
         # Generate timestamp within last hour
-        now = datetime.utcnow()
-        order_time = now - timedelta(minutes=random.randint(0, 60))
+        order_time = _utc_from_epoch(time.time() - 60 * (((r >> 32) & 0xFF) % 61))
+        
+        return (
+            order_id,
+            customer_id,
+            order_time,
+            _ORDER_STATUSES[(r >> 40) & 3],
+            lines,
+            f"{100 + (r >> 48) % 9900} {_STREETS[(a & 0xFF) % len(_STREETS)]} St",
+            _CITIES[((a >> 8) & 0xFF) % len(_CITIES)],
+            _COUNTRIES[(a >> 16) % len(_COUNTRIES)],
+            total_amount
+        )
+    
+    def generate_order_event(self) -> Dict[str, Any]:
+        """Generate a realistic order event"""
+        order_id, customer_id, order_time, status, lines, street, city, country, total_amount = self._draw_order()
+        
+        items = []
+        for idx, qty in lines:
+            item = _PRODUCT_ITEM_TEMPLATES[idx].copy()
+            item["quantity"] = qty
+            items.append(item)
         
         return {
             "event_type": "order",
             "order_id": order_id,
             "customer_id": customer_id,
-            "order_date": order_time.isoformat() + "Z",
-            "status": random.choice(self.order_statuses),
+            "order_date": order_time,
+            "status": status,
             "items": items,
             "shipping_address": {
-                "street": f"{random.randint(100, 9999)} {random.choice(['Main', 'Oak', 'Pine', 'Maple', 'Cedar'])} St",
-                "city": random.choice(self.cities),
-                "country": random.choice(self.countries)
+                "street": street,
+                "city": city,
+                "country": country
             },
-            "total_amount": round(total_amount, 2)
+            "total_amount": total_amount
         }
     
-    def generate_inventory_event(self) -> Dict[str, Any]:
-        """Generate a realistic inventory event"""
-        product = random.choice(self.products)
-        warehouse = random.choice(self.warehouses)
-        reason = random.choice(self.inventory_reasons)
+    def generate_order_event_bytes(self) -> bytes:
+        """Generate an order event directly as its published JSON payload"""
+        order_id, customer_id, order_time, status, lines, street, city, country, total_amount = self._draw_order()
+        items = ",".join([_ORDER_ITEM_JSON[idx] % qty for idx, qty in lines])
+        return (_ORDER_JSON % (
+            order_id, customer_id, _iso_utc(order_time), status, items, street, city, country, total_amount
+        )).encode()
+    
+    def _draw_inventory(self):
+        """Draw the variable fields of an inventory event"""
+        r = self._rng.getrandbits(64)
+        product_id = _PRODUCT_IDS[(r & 0xFF) % len(_PRODUCT_IDS)]
+        warehouse = _WAREHOUSES[((r >> 8) & 0xFF) % len(_WAREHOUSES)]
+        reason = _INVENTORY_REASONS[(r >> 16) & 3]
         
         # Adjust quantity change based on reason
+        q = (r >> 32) & 0xFFFF
         if reason == "restock":
-            quantity_change = random.randint(10, 100)
+            quantity_change = 10 + q % 91
         elif reason == "sale":
-            quantity_change = random.randint(-50, -1)
+            quantity_change = -1 - q % 50
         elif reason == "return":
-            quantity_change = random.randint(1, 20)
+            quantity_change = 1 + q % 20
         else:  # damage
-            quantity_change = random.randint(-10, -1)
+            quantity_change = -1 - q % 10
         
-        timestamp = datetime.utcnow() - timedelta(minutes=random.randint(0, 30))
+        timestamp = _utc_from_epoch(time.time() - 60 * (((r >> 24) & 0xFF) % 31))
         
+        return f"inv-{self._short_id(4)}", product_id, warehouse, quantity_change, reason, timestamp
+    
+    def generate_inventory_event(self) -> Dict[str, Any]:
+        """Generate a realistic inventory event"""
+        inventory_id, product_id, warehouse, quantity_change, reason, timestamp = self._draw_inventory()
         return {
             "event_type": "inventory",
-            "inventory_id": f"inv-{uuid.uuid4().hex[:8]}",
-            "product_id": product["id"],
+            "inventory_id": inventory_id,
+            "product_id": product_id,
             "warehouse_id": warehouse,
             "quantity_change": quantity_change,
             "reason": reason,
-            "timestamp": timestamp.isoformat() + "Z"
+            "timestamp": timestamp
         }
     
+    def generate_inventory_event_bytes(self) -> bytes:
+        """Generate an inventory event directly as its published JSON payload"""
+        inventory_id, product_id, warehouse, quantity_change, reason, timestamp = self._draw_inventory()
+        return (_INVENTORY_JSON % (
+            inventory_id, product_id, warehouse, quantity_change, reason, _iso_utc(timestamp)
+        )).encode()
+    
+    def _draw_user_activity(self):
+        """Draw the variable fields of a user activity event"""
+        r = self._rng.getrandbits(64)
+        user_id = f"user-{(r & 0xFFFF) % 1000 + 1:04d}"
+        activity_type = _ACTIVITY_TYPES[((r >> 16) & 0xFF) % len(_ACTIVITY_TYPES)]
+        platform = _PLATFORMS[((r >> 24) & 0xFF) % len(_PLATFORMS)]
+        user_agent = _USER_AGENTS[(r >> 32) & 3]
+        
+        # Generate realistic IP address: first octet 192-203, last octet 1-254,
+        # from one 32-bit draw formatted by inet_ntoa in C
+        ip = self._rng.getrandbits(32)
+        ip = ((192 + (ip >> 24) % 12) << 24) | (ip & 0xFFFF00) | ((ip & 0xFF) % 254 + 1)
+        ip_address = _inet_ntoa(ip.to_bytes(4, "big"))
+        
+        timestamp = _utc_from_epoch(time.time() - 60 * (((r >> 40) & 0xFF) % 16))
+        
+        return user_id, activity_type, ip_address, user_agent, timestamp, f"sess-{self._short_id(6)}", platform
+    
     def generate_user_activity_event(self) -> Dict[str, Any]:
         """Generate a realistic user activity event"""
-        user_id = f"user-{random.randint(1, 1000):04d}"
-        activity_type = random.choice(self.activity_types)
-        platform = random.choice(self.platforms)
-        
-        # Generate realistic IP address
-        ip_address = f"{random.randint(192, 203)}.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(1, 254)}"
-        
-        timestamp = datetime.utcnow() - timedelta(minutes=random.randint(0, 15))
-        
+        user_id, activity_type, ip_address, user_agent, timestamp, session_id, platform = self._draw_user_activity()
         return {
             "event_type": "user_activity",
             "user_id": user_id,
             "activity_type": activity_type,
             "ip_address": ip_address,
-            "user_agent": random.choice(self.user_agents),
-            "timestamp": timestamp.isoformat() + "Z",
+            "user_agent": user_agent,
+            "timestamp": timestamp,
             "metadata": {
-                "session_id": f"sess-{uuid.uuid4().hex[:12]}",
+                "session_id": session_id,
                 "platform": platform
             }
         }
     
+    def generate_user_activity_event_bytes(self) -> bytes:
+        """Generate a user activity event directly as its published JSON payload"""
+        user_id, activity_type, ip_address, user_agent, timestamp, session_id, platform = self._draw_user_activity()
+        return (_USER_ACTIVITY_JSON % (
+            user_id, activity_type, ip_address, user_agent, _iso_utc(timestamp), session_id, platform
+        )).encode()
+    
     def generate_event(self, event_type: str) -> Dict[str, Any]:
         """Generate an event of the specified type"""
-        generators = {
-            "order": self.generate_order_event,
-            "inventory": self.generate_inventory_event,
-            "user_activity": self.generate_user_activity_event
-        }
-        
-        generator = generators.get(event_type)
-        if not generator:
-            raise ValueError(f"Unknown event type: {event_type}")
-        
-        return generator()
+        return self.get_generator(event_type)()
     
-    async def publish_event(self, event: Dict[str, Any]) -> bool:
-        """Publish event to Pub/Sub"""
+    def get_generator(self, event_type: str) -> Callable[[], Dict[str, Any]]:
+        """Resolve the generator function for an event type"""
         try:
-            message_data = json.dumps(event).encode('utf-8')
-            future = get_publisher().publish(self.topic_path, message_data)
-            
-            # Wait for publish to complete
-            message_id = future.result()
-            logger.info(f"Published {event['event_type']} event with message ID: {message_id}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to publish event: {e}")
-            return False
+            return self._generators[event_type]
+        except KeyError:
+            raise ValueError(f"Unknown event type: {event_type}") from None
+    
+    def get_encoder(self, event_type: str) -> Callable[[], bytes]:
+        """Resolve the function generating an event type as its JSON payload"""
+        try:
+            return self._encoders[event_type]
+        except KeyError:
+            raise ValueError(f"Unknown event type: {event_type}") from None
+    
+    def publish_event(self, event: Dict[str, Any]) -> futures.Future:
+        """Publish event to Pub/Sub without waiting for the result
+
+        The returned future resolves to the message ID once the client has
+        flushed the batch containing this event.
+        """
+        return self.publish_payload(orjson.dumps(event, option=EVENT_JSON_OPTIONS), event['event_type'])
+    
+    def publish_payload(self, message_data: bytes, event_type: str) -> futures.Future:
+        """Publish an already-encoded event payload to Pub/Sub"""
+        future = get_publisher().publish(self.topic_path, message_data)
+        future.add_done_callback(
+            lambda f: _log_publish_result(f, event_type)
+        )
+        return future
+
+def _log_publish_result(future: futures.Future, event_type: str):
+    """Done-callback that logs the outcome of a publish"""
+    error = future.exception()
+    if error is not None:
+        logger.error(f"Failed to publish {event_type} event: {error}")
+    else:
+        logger.info(f"Published {event_type} event with message ID: {future.result()}")
 
 # Initialize generator
 generator = None
@@ -279,21 +480,25 @@ async def debug_info():
         "timestamp": datetime.utcnow().isoformat() + "Z"
     }
 
-@app.post("/generate/single/{event_type}")
+@app.post("/generate/single/{event_type}", response_class=EventJSONResponse)
 async def generate_single_event(event_type: str):
     """Generate and publish a single event"""
     try:
         gen = ensure_generator()
         event = gen.generate_event(event_type)
-        success = await gen.publish_event(event)
+        try:
+            await asyncio.wrap_future(gen.publish_event(event))
+            success = True
+        except Exception:
+            success = False
         
         if success:
-            return {
+            return EventJSONResponse({
                 "status": "success",
                 "event_type": event_type,
                 "event": event,
                 "timestamp": datetime.utcnow().isoformat() + "Z"
-            }
+            })
         else:
             raise HTTPException(status_code=500, detail="Failed to publish event")
             
@@ -302,43 +507,128 @@ async def generate_single_event(event_type: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
 
+def _event_id(event: Dict[str, Any]) -> str:
+    """Identifier reported for an event in batch results"""
+    return event.get("order_id") or event.get("inventory_id") or event.get("user_id", "unknown")
+
+def _publish_or_failed(gen: EventGenerator, event: Dict[str, Any]) -> futures.Future:
+    """Publish an event, turning a synchronous publish error into a failed future
+
+    Keeps one bad publish (e.g. a publisher that fails to initialise) from
+    aborting a whole batch; the error is counted as a per-event failure instead.
+    """
+    try:
+        return gen.publish_event(event)
+    except Exception as e:
+        logger.error(f"Failed to publish {event['event_type']} event: {e}")
+        future = futures.Future()
+        future.set_exception(e)
+        return future
+
+async def _stream_batch_events(gen: EventGenerator, config: GenerationConfig):
+    """Generate and publish a batch, yielding one NDJSON result line per event
+
+    Only publishes still in flight are held in memory; results are emitted as
+    soon as their publish completes, followed by a final summary line.
+    """
+    loop = asyncio.get_running_loop()
+    in_flight = deque()
+    successful = failed = 0
+    events_per_type = config.events_per_minute // len(config.event_types)
+    
+    async def publish_result(event_type, event_id, future):
+        nonlocal successful, failed
+        try:
+            await asyncio.wrap_future(future)
+            successful += 1
+            success = True
+        except Exception:
+            failed += 1
+            success = False
+        return orjson.dumps({"event_type": event_type, "success": success, "event_id": event_id}) + b"\n"
+    
+    for event_type in config.event_types:
+        for _ in range(events_per_type):
+            try:
+                event = await loop.run_in_executor(_gen_pool, gen.generate_event, event_type)
+                in_flight.append((event_type, _event_id(event), gen.publish_event(event)))
+            except Exception as e:
+                logger.error(f"Error generating {event_type} event: {e}")
+                failed += 1
+                yield orjson.dumps({"event_type": event_type, "success": False, "error": str(e)}) + b"\n"
+            
+            while in_flight and in_flight[0][2].done():
+                yield await publish_result(*in_flight.popleft())
+    
+    while in_flight:
+        yield await publish_result(*in_flight.popleft())
+    
+    yield orjson.dumps({
+        "status": "completed",
+        "total_events": successful + failed,
+        "successful_events": successful,
+        "failed_events": failed,
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }) + b"\n"
+
 @app.post("/generate/batch")
-async def generate_batch_events(config: GenerationConfig):
-    """Generate a batch of events immediately"""
+async def generate_batch_events(config: GenerationConfig, stream: bool = False):
+    """Generate a batch of events immediately
+
+    With ?stream=true the per-event results are streamed back as NDJSON while
+    the batch runs, instead of being collected into a single response.
+    """
     try:
         gen = ensure_generator()
+        if stream:
+            return StreamingResponse(_stream_batch_events(gen, config), media_type="application/x-ndjson")
+        
+        loop = asyncio.get_running_loop()
         results = []
+        pending = []
+        events = []
+        successful = failed = 0
         events_per_type = config.events_per_minute // len(config.event_types)
         
+        # Generate the whole batch off the event loop first; this part is CPU-only
         for event_type in config.event_types:
-            for _ in range(events_per_type):
-                try:
-                    event = gen.generate_event(event_type)
-                    success = await gen.publish_event(event)
-                    results.append({
-                        "event_type": event_type,
-                        "success": success,
-                        "event_id": event.get("order_id") or event.get("inventory_id") or event.get("user_id", "unknown")
-                    })
-                    
-                    # Small delay to avoid overwhelming
-                    await asyncio.sleep(0.1)
-                    
-                except Exception as e:
-                    logger.error(f"Error generating {event_type} event: {e}")
-                    results.append({
-                        "event_type": event_type,
-                        "success": False,
-                        "error": str(e)
-                    })
-        
-        successful = len([r for r in results if r["success"]])
+            try:
+                generate = gen.get_generator(event_type)
+            except ValueError as e:
+                logger.error(f"Error generating {event_type} event: {e}")
+                failed += events_per_type
+                results.extend(
+                    {"event_type": event_type, "success": False, "error": str(e)}
+                    for _ in range(events_per_type)
+                )
+                continue
+            batch = await loop.run_in_executor(
+                _gen_pool, lambda: [generate() for _ in range(events_per_type)]
+            )
+            for event in batch:
+                result = {"event_type": event_type, "success": False, "event_id": _event_id(event)}
+                results.append(result)
+                pending.append(result)
+                events.append(event)
+        
+        # Then publish everything concurrently; batching is handled by the publisher client
+        outcomes = await asyncio.gather(
+            *(asyncio.wrap_future(_publish_or_failed(gen, event)) for event in events),
+            return_exceptions=True
+        )
+        for result, outcome in zip(pending, outcomes):
+            if isinstance(outcome, BaseException):
+                result["error"] = str(outcome)
+                failed += 1
+            else:
+                result["success"] = True
+                successful += 1
         
         return {
             "status": "completed",
-            "total_events": len(results),
+            "total_events": successful + failed,
             "successful_events": successful,
-            "failed_events": len(results) - successful,
+            "failed_events": failed,
             "results": results,
             "timestamp": datetime.utcnow().isoformat() + "Z"
         }
@@ -351,52 +641,65 @@ async def continuous_generation_task(task_id: str, config: GenerationConfig):
     """Background task for continuous event generation"""
     logger.info(f"Starting continuous generation task {task_id}")
     
-    total_events = config.events_per_minute * config.duration_minutes
-    events_per_type = total_events // len(config.event_types)
-    
     interval = 60.0 / config.events_per_minute  # seconds between events
     
-    start_time = datetime.utcnow()
-    end_time = start_time + timedelta(minutes=config.duration_minutes)
+    deadline = time.monotonic() + config.duration_minutes * 60
     
     event_count = 0
     
+    stop_event = generation_stop_events.get(task_id)
+    task_info = generation_tasks.get(task_id)
+    if stop_event is None or task_info is None:
+        logger.info(f"Generation task {task_id} was stopped before it started")
+        return
+    
     try:
         gen = ensure_generator()
-        while datetime.utcnow() < end_time and task_id in generation_tasks:
-            for event_type in config.event_types:
-                if datetime.utcnow() >= end_time or task_id not in generation_tasks:
-                    break
+        loop = asyncio.get_running_loop()
+        # Round-robin over event types, one event per tick; dispatch is resolved once up front
+        # and events are rendered straight to their JSON payload
+        encoders = itertools.cycle([(event_type, gen.get_encoder(event_type)) for event_type in config.event_types])
+        # Absolute schedule so publish latency doesn't drag the rate below events_per_minute
+        next_tick = time.monotonic()
+        while not stop_event.is_set() and next_tick < deadline:
+            event_type, encode = next(encoders)
+            try:
+                payload = await loop.run_in_executor(_gen_pool, encode)
+                gen.publish_payload(payload, event_type)
+                event_count += 1
+                
+                # Update task status
+                task_info["events_generated"] = event_count
+                task_info["last_event_time"] = datetime.utcnow().isoformat() + "Z"
+                
+                next_tick += interval
+                sleep_for = next_tick - time.monotonic()
+                if sleep_for > 0:
+                    # Wait on the stop event itself so a stop request takes effect immediately
+                    try:
+                        await asyncio.wait_for(stop_event.wait(), sleep_for)
+                    except asyncio.TimeoutError:
+                        pass
                 
-                try:
-                    event = gen.generate_event(event_type)
-                    await gen.publish_event(event)
-                    event_count += 1
-                    
-                    # Update task status
-                    if task_id in generation_tasks:
-                        generation_tasks[task_id]["events_generated"] = event_count
-                        generation_tasks[task_id]["last_event_time"] = datetime.utcnow().isoformat() + "Z"
-                    
-                    await asyncio.sleep(interval / len(config.event_types))
-                    
-                except Exception as e:
-                    logger.error(f"Error in continuous generation: {e}")
-                    await asyncio.sleep(1)  # Brief pause on error
+            except Exception as e:
+                logger.error(f"Error in continuous generation: {e}")
+                await asyncio.sleep(1)  # Brief pause on error
+                next_tick = time.monotonic()
         
         # Mark task as completed
-        if task_id in generation_tasks:
-            generation_tasks[task_id]["status"] = "completed"
-            generation_tasks[task_id]["end_time"] = datetime.utcnow().isoformat() + "Z"
-            generation_tasks[task_id]["total_events"] = event_count
+        if not stop_event.is_set():
+            task_info["status"] = "completed"
+            task_info["end_time"] = datetime.utcnow().isoformat() + "Z"
+            task_info["total_events"] = event_count
         
         logger.info(f"Completed generation task {task_id} with {event_count} events")
         
     except Exception as e:
         logger.error(f"Task {task_id} failed: {e}")
-        if task_id in generation_tasks:
-            generation_tasks[task_id]["status"] = "failed"
-            generation_tasks[task_id]["error"] = str(e)
+        task_info["status"] = "failed"
+        task_info["error"] = str(e)
+    finally:
+        generation_stop_events.pop(task_id, None)
 
 
 @app.post("/generate/start")
@@ -415,6 +718,7 @@ async def start_continuous_generation(config: GenerationConfig, background_tasks
             "events_generated": 0,
             "last_event_time": None
         }
+        generation_stop_events[task_id] = asyncio.Event()
         
         # Start background task
         background_tasks.add_task(continuous_generation_task, task_id, config)
@@ -451,7 +755,10 @@ async def stop_generation_task(task_id: str):
     if task_id not in generation_tasks:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    # Remove task to signal it should stop
+    # Signal the task to stop and remove it from the active list
+    stop_event = generation_stop_events.pop(task_id, None)
+    if stop_event is not None:
+        stop_event.set()
     task_info = generation_tasks.pop(task_id)
     task_info["status"] = "stopped"
     task_info["end_time"] = datetime.utcnow().isoformat() + "Z"
@@ -471,8 +778,12 @@ async def stop_all_generation_tasks():
         generation_tasks[task_id]["status"] = "stopped"
         generation_tasks[task_id]["end_time"] = datetime.utcnow().isoformat() + "Z"
     
+    for stop_event in generation_stop_events.values():
+        stop_event.set()
+    
     # Clear all tasks
     generation_tasks.clear()
+    generation_stop_events.clear()
     
     return {
         "status": "all_stopped",
@@ -480,17 +791,17 @@ async def stop_all_generation_tasks():
         "stopped_tasks": stopped_tasks
     }
 
-@app.get("/sample/{event_type}")
+@app.get("/sample/{event_type}", response_class=EventJSONResponse)
 async def get_sample_event(event_type: str):
     """Get a sample event without publishing it"""
     try:
         gen = ensure_generator()
         event = gen.generate_event(event_type)
-        return {
+        return EventJSONResponse({
             "event_type": event_type,
             "sample_event": event,
             "timestamp": datetime.utcnow().isoformat() + "Z"
-        }
+        })
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -498,21 +809,20 @@ async def get_sample_event(event_type: str):
 async def get_demo_scenarios():
     """Get all available demo scenarios with descriptions"""
     return {
-        "scenarios": DemoScenarios.get_all_scenarios(),
+        "scenarios": _SCENARIO_CACHE,
         "usage": "Use /scenarios/{scenario_name}/start to run a predefined scenario",
-        "available_scenarios": list(DemoScenarios.get_all_scenarios().keys())
+        "available_scenarios": list(_SCENARIO_CACHE.keys())
     }
 
 @app.get("/scenarios/{scenario_name}")
 async def get_demo_scenario(scenario_name: str):
     """Get details of a specific demo scenario"""
     try:
-        all_scenarios = DemoScenarios.get_all_scenarios()
-        if scenario_name not in all_scenarios:
-            available = list(all_scenarios.keys())
+        if scenario_name not in _SCENARIO_CACHE:
+            available = list(_SCENARIO_CACHE.keys())
             raise HTTPException(status_code=404, detail=f"Scenario not found. Available: {available}")
         
-        return all_scenarios[scenario_name]
+        return _SCENARIO_CACHE[scenario_name]
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -534,11 +844,12 @@ async def start_demo_scenario(scenario_name: str, background_tasks: BackgroundTa
             "events_generated": 0,
             "last_event_time": None
         }
+        generation_stop_events[task_id] = asyncio.Event()
         
         # Start background task
         background_tasks.add_task(continuous_generation_task, task_id, config)
         
-        scenario_info = DemoScenarios.get_all_scenarios()[scenario_name]
+        scenario_info = _SCENARIO_CACHE[scenario_name]
         
         return {
             "status": "started",
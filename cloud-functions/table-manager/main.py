@@ -1,12 +1,14 @@
-import json
 import os
-import base64
+import asyncio
 import logging
+import orjson
+from binascii import a2b_base64
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI, Request, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from google.cloud import bigquery
 from google.cloud.exceptions import NotFound, Conflict
-from table_schemas import get_table_schema
+from table_schemas import TABLE_CONFIG
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -23,6 +25,23 @@ except Exception as e:
     logger.error(f"Failed to initialize BigQuery client: {e}")
     client = None
 
+# Map event types to BigQuery table names
+TABLE_MAPPING = {
+    'order': 'orders',
+    'inventory': 'inventory',
+    'user_activity': 'user_activity'
+}
+
+# Threads for the blocking BigQuery calls. They only run for tables not yet known
+# to exist, under that table's lock, so at most one call per table is in flight.
+_bq_pool = ThreadPoolExecutor(max_workers=len(TABLE_MAPPING), thread_name_prefix="bq-table")
+
+# Tables confirmed to exist; warm instances skip the get_table RPC and the lock
+_known_tables: set[str] = set()
+
+# Per-table locks so concurrent events for a missing table create it only once
+_CREATE_LOCKS: dict[str, asyncio.Lock] = {}
+
 # Pydantic models for request validation
 class PubSubMessage(BaseModel):
     data: str
@@ -54,19 +73,37 @@ async def handle_pubsub_message(request: Request):
         raise HTTPException(status_code=400, detail="Not a valid CloudEvent")
 
     try:
-        body = await request.json()
-        envelope = PubSubRequest(**body)
+        # Parse and validate the envelope in a single pass over the raw body
+        envelope = PubSubRequest.model_validate_json(await request.body())
 
         # Decode the Pub/Sub message data
-        message_data = base64.b64decode(envelope.message.data).decode('utf-8')
-        event_data = json.loads(message_data)
+        # orjson parses the decoded UTF-8 bytes directly, no str copy needed
+        message_data = a2b_base64(envelope.message.data)
+        try:
+            event_data = orjson.loads(message_data)
+        except orjson.JSONDecodeError:
+            # orjson also rejects non-UTF-8 data; that is a bad message rather than
+            # bad JSON, so answer 200 to keep Pub/Sub from retrying it
+            try:
+                message_data.decode('utf-8')
+            except UnicodeDecodeError as e:
+                logger.error(f"Error processing event: {e}")
+                return {"status": "error", "detail": str(e)}, 200
+            raise
 
         logger.info(f"Processing event: {event_data}")
-        process_event(event_data)
+        await process_event(event_data)
 
         return {"status": "success"}, 200
 
-    except json.JSONDecodeError as e:
+    except ValidationError as e:
+        if any(error['type'] == 'json_invalid' for error in e.errors()):
+            logger.error(f"Failed to decode JSON from Pub/Sub message: {e}")
+            raise HTTPException(status_code=400, detail="Invalid JSON in Pub/Sub message")
+        logger.error(f"Error processing event: {e}")
+        # A well-formed envelope with the wrong shape is a bad message: don't retry it
+        return {"status": "error", "detail": str(e)}, 200
+    except orjson.JSONDecodeError as e:
         logger.error(f"Failed to decode JSON from Pub/Sub message: {e}")
         raise HTTPException(status_code=400, detail="Invalid JSON in Pub/Sub message")
     except Exception as e:
@@ -74,7 +111,7 @@ async def handle_pubsub_message(request: Request):
         # Return a 200-level status to prevent Pub/Sub from retrying a bad message
         return {"status": "error", "detail": str(e)}, 200
 
-def process_event(event_data: dict):
+async def process_event(event_data: dict):
     """
     Core logic to process the event data and create a BigQuery table.
     """
@@ -88,13 +125,7 @@ def process_event(event_data: dict):
         logger.warning("No event_type found in message")
         return
 
-    table_mapping = {
-        'order': 'orders',
-        'inventory': 'inventory',
-        'user_activity': 'user_activity'
-    }
-
-    table_name = table_mapping.get(event_type)
+    table_name = TABLE_MAPPING.get(event_type)
     if not table_name:
         logger.info(f"No table mapping found for event_type: {event_type}")
         return
@@ -110,10 +141,29 @@ def process_event(event_data: dict):
     # Create table if it doesn't exist
     table_id = f"{project_id}.{dataset_id}.{table_name}"
 
-    if not table_exists(table_id):
-        create_bigquery_table(project_id, dataset_id, table_name, environment)
-    else:
+    # Fast path: no lock and no RPC once the table is known to exist
+    if table_id in _known_tables:
         logger.info(f"Table {table_id} already exists.")
+        return
+
+    lock = _CREATE_LOCKS.get(table_id)
+    if lock is None:
+        lock = _CREATE_LOCKS[table_id] = asyncio.Lock()
+
+    # BigQuery calls are blocking, so run them on _bq_pool off the event loop. Re-checking
+    # under the lock means events queued behind a create see the new table.
+    loop = asyncio.get_running_loop()
+    async with lock:
+        if table_id in _known_tables:
+            logger.info(f"Table {table_id} already exists.")
+        elif await loop.run_in_executor(_bq_pool, table_exists, table_id):
+            logger.info(f"Table {table_id} already exists.")
+            _known_tables.add(table_id)
+        else:
+            await loop.run_in_executor(
+                _bq_pool, create_bigquery_table, project_id, dataset_id, table_name, environment
+            )
+            _known_tables.add(table_id)
 
 def table_exists(table_id: str) -> bool:
     """Check if a BigQuery table exists."""
@@ -126,23 +176,15 @@ def table_exists(table_id: str) -> bool:
 def create_bigquery_table(project_id: str, dataset_id: str, table_name: str, environment: str):
     """Create a BigQuery table with the appropriate schema."""
     try:
-        schema = get_table_schema(table_name)
+        config = TABLE_CONFIG[table_name]
         table_ref = client.dataset(dataset_id, project=project_id).table(table_name)
-        table = bigquery.Table(table_ref, schema=schema)
+        table = bigquery.Table(table_ref, schema=config['schema'])
 
         # Add partitioning and clustering
-        if "event_date" in [field.name for field in schema]:
-             table.time_partitioning = bigquery.TimePartitioning(
-                type_=bigquery.TimePartitioningType.DAY,
-                field="event_date"
-             )
-
-        if table_name == 'orders':
-            table.clustering_fields = ["customer_id", "status"]
-        elif table_name == 'inventory':
-            table.clustering_fields = ["product_id", "warehouse_id"]
-        elif table_name == 'user_activity':
-            table.clustering_fields = ["user_id", "activity_type"]
+        if config['time_partitioning']:
+            table.time_partitioning = config['time_partitioning']
+
+        table.clustering_fields = list(config['clustering_fields'])
 
         table.labels = {
             'environment': environment,
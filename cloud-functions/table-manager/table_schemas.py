@@ -10,17 +10,11 @@ def get_table_schema(table_name):
     Returns:
         List of SchemaField objects
     """
-    schemas = {
-        'orders': get_orders_schema(),
-        'inventory': get_inventory_schema(), 
-        'user_activity': get_user_activity_schema()
-    }
-    
-    schema = schemas.get(table_name)
-    if not schema:
+    config = TABLE_CONFIG.get(table_name)
+    if not config:
         raise ValueError(f"No schema defined for table: {table_name}")
     
-    return schema
+    return config['schema']
 
 def get_orders_schema():
     """Schema for orders table - matching assessment requirements"""
@@ -78,4 +72,26 @@ def get_user_activity_schema():
         # Additional fields for processing
         bigquery.SchemaField("processed_timestamp", "TIMESTAMP", mode="NULLABLE"),
         bigquery.SchemaField("event_date", "DATE", mode="NULLABLE")
-    ] 
\ No newline at end of file
+    ] 
+
+def _table_config(schema, clustering_fields, partition_field='event_date'):
+    """Bundle a schema with its clustering fields and daily time partitioning"""
+    field_names = {field.name for field in schema}
+    time_partitioning = None
+    if partition_field in field_names:
+        time_partitioning = bigquery.TimePartitioning(
+            type_=bigquery.TimePartitioningType.DAY,
+            field=partition_field
+        )
+    return {
+        'schema': schema,
+        'clustering_fields': clustering_fields,
+        'time_partitioning': time_partitioning
+    }
+
+# Static per-table settings, built once at import
+TABLE_CONFIG = {
+    'orders': _table_config(get_orders_schema(), ("customer_id", "status")),
+    'inventory': _table_config(get_inventory_schema(), ("product_id", "warehouse_id")),
+    'user_activity': _table_config(get_user_activity_schema(), ("user_id", "activity_type"))
+}
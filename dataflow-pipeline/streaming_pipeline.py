@@ -4,20 +4,94 @@ Processes events from Pub/Sub and writes to BigQuery and GCS
 """
 
 import argparse
-import json
 import logging
 from datetime import datetime
+from operator import itemgetter
 from typing import Dict, Any
 
 import apache_beam as beam
-from apache_beam.options.pipeline_options import PipelineOptions, StandardOptions
+import orjson
+from apache_beam.options.pipeline_options import DebugOptions, PipelineOptions, StandardOptions
 from apache_beam.io import ReadFromPubSub
+from apache_beam.io.filesystem import CompressionTypes
 from apache_beam.io.gcp.bigquery import WriteToBigQuery
+from apache_beam.io.gcp.bigquery_tools import RetryStrategy
 from apache_beam.io.textio import WriteToText
 
 
+# Map event types to BigQuery table names
+TABLE_MAPPING = {
+    'order': 'orders',
+    'inventory': 'inventory',
+    'user_activity': 'user_activity'
+}
+
+# Event field holding each event type's timestamp (orders use order_date)
+TIMESTAMP_FIELDS = {
+    'order': 'order_date',
+    'inventory': 'timestamp',
+    'user_activity': 'timestamp'
+}
+
+# Output tags for BigQuery rows and for (file_path, json_content) GCS records
+BIGQUERY_TAG = 'bigquery'
+GCS_TAG = 'gcs'
+
+# Default SDK harness threads per worker; more threads keep the Pub/Sub
+# StreamingPull saturated for small, message-rate-bound events
+WORKER_HARNESS_THREADS = 16
+
+# Shared WriteToBigQuery settings: batched, auto-sharded streaming inserts.
+# Rows are flushed every 500 rows or once a second, and insert ids are skipped
+# (at-least-once delivery) for the higher streaming-insert throughput quota.
+# Only transient insert errors are retried, so one invalid row cannot stall the sink.
+BIGQUERY_WRITE_OPTIONS = {
+    'method': WriteToBigQuery.Method.STREAMING_INSERTS,
+    'write_disposition': beam.io.BigQueryDisposition.WRITE_APPEND,
+    'create_disposition': beam.io.BigQueryDisposition.CREATE_NEVER,
+    'batch_size': 500,
+    'triggering_frequency': 1,
+    'with_auto_sharding': True,
+    'ignore_insert_ids': True,
+    'insert_retry_strategy': RetryStrategy.RETRY_ON_TRANSIENT_ERROR
+}
+
+
+def _path_timestamp(timestamp):
+    """
+    Return an ISO timestamp in a shape whose fields can be sliced directly
+    
+    Canonical 'YYYY-MM-DDTHH:MM:SS[.fff...][Z]' strings are returned as is
+    once their date and time fields are checked; any other ISO form is
+    normalised through datetime, and unparseable values give None.
+    """
+    body = timestamp[:-1] if timestamp[-1:] == 'Z' else timestamp
+    if (len(body) >= 19 and body[4] == '-' and body[7] == '-'
+            and body[10] == 'T' and body[13] == ':' and body[16] == ':'
+            and (len(body) == 19 or (body[19] == '.' and len(body) >= 23 and body[20:].isdigit()))):
+        # The separators only fix the shape; the date and time fields must be real
+        try:
+            datetime.fromisoformat(body[:19])
+        except ValueError:
+            return None
+        return timestamp
+    try:
+        dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
+
+
 class EventProcessor(beam.DoFn):
-    """Process and transform events for BigQuery and GCS output"""
+    """Process and transform events for BigQuery and GCS output
+    
+    Formats each event for both sinks in a single pass: rows for known event
+    types go to BIGQUERY_TAG, and every event's GCS record to GCS_TAG.
+    """
+    
+    def start_bundle(self):
+        """Take the processing time once per bundle rather than per event"""
+        self._now_iso = datetime.utcnow().isoformat() + 'Z'
     
     def process(self, element):
         """
@@ -27,11 +101,12 @@ class EventProcessor(beam.DoFn):
             element: Raw message from Pub/Sub
             
         Yields:
-            Tuple of (event_type, processed_event)
+            TaggedOutput of the BigQuery row for known event types, and
+            TaggedOutput of (file_path, json_content) for GCS
         """
         try:
-            # Parse JSON message
-            event_data = json.loads(element.decode('utf-8'))
+            # Parse JSON message (orjson reads the UTF-8 bytes directly)
+            event_data = orjson.loads(element)
             event_type = event_data.get('event_type')
             
             if not event_type:
@@ -39,108 +114,38 @@ class EventProcessor(beam.DoFn):
                 return
             
             # Add processing timestamp and event_date
-            now = datetime.utcnow()
-            event_data['processed_timestamp'] = now.isoformat() + 'Z'
-            
-            # Extract or create event_date for partitioning
-            if event_type == 'order':
-                # Use order_date for partitioning
-                order_date = event_data.get('order_date')
-                if order_date:
-                    event_date = datetime.fromisoformat(order_date.replace('Z', '+00:00')).date()
-                else:
-                    event_date = now.date()
-            elif event_type in ['inventory', 'user_activity']:
-                # Use timestamp field
-                timestamp = event_data.get('timestamp')
-                if timestamp:
-                    event_date = datetime.fromisoformat(timestamp.replace('Z', '+00:00')).date()
-                else:
-                    event_date = now.date()
-            else:
-                event_date = now.date()
-            
-            event_data['event_date'] = event_date.isoformat()
-            
-            # Yield tuple for downstream processing
-            yield (event_type, event_data)
-            
-        except Exception as e:
-            logging.error(f"Error processing event: {e}, Element: {element}")
-
-
-class FormatForBigQuery(beam.DoFn):
-    """Format events for BigQuery insertion"""
-    
-    def process(self, element):
-        """
-        Format event for BigQuery
-        
-        Args:
-            element: Tuple of (event_type, event_data)
+            event_data['processed_timestamp'] = self._now_iso
             
-        Yields:
-            Dict formatted for BigQuery
-        """
-        event_type, event_data = element
-        
-        # Map event types to table names
-        table_mapping = {
-            'order': 'orders',
-            'inventory': 'inventory',
-            'user_activity': 'user_activity'
-        }
-        
-        table_name = table_mapping.get(event_type)
-        if table_name:
-            # Add table destination info
-            event_data['_table_name'] = table_name
-            yield event_data
-
-
-class FormatForGCS(beam.DoFn):
-    """Format events for GCS output with specific folder structure"""
-    
-    def process(self, element):
-        """
-        Format event for GCS with folder structure
-        
-        Args:
-            element: Tuple of (event_type, event_data)
+            # Extract or create event_date for partitioning. Source timestamps are
+            # ISO 8601 strings, so once their shape is checked the date is just
+            # their first 10 characters.
+            timestamp = event_data.get(TIMESTAMP_FIELDS.get(event_type))
+            ts = self._now_iso
+            if timestamp:
+                ts = _path_timestamp(timestamp)
+                if ts is None:
+                    raise ValueError(f"Invalid timestamp: {timestamp}")
             
-        Yields:
-            Tuple of (file_path, json_content)
-        """
-        event_type, event_data = element
-        
-        try:
-            # Get timestamp for folder structure
-            if event_type == 'order':
-                timestamp_str = event_data.get('order_date')
-            elif event_type in ['inventory', 'user_activity']:
-                timestamp_str = event_data.get('timestamp')
-            else:
-                timestamp_str = datetime.utcnow().isoformat() + 'Z'
-            
-            # Parse timestamp to create folder structure
-            if timestamp_str:
-                dt = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-            else:
-                dt = datetime.utcnow()
+            event_data['event_date'] = ts[:10]
             
-            # Create folder structure: output/event_type/YYYY/MM/DD/HH/MM/
-            folder_path = f"output/{event_type}/{dt.year:04d}/{dt.month:02d}/{dt.day:02d}/{dt.hour:02d}/{dt.minute:02d}"
+            # Create folder structure from the same ISO fields: output/event_type/YYYY/MM/DD/HH/MM/
+            folder_path = '/'.join(('output', event_type, ts[0:4], ts[5:7], ts[8:10], ts[11:13], ts[14:16]))
             
             # Create filename with timestamp and unique identifier
-            filename = f"{event_type}_{dt.strftime('%Y%m%d%H%M')}{dt.second:02d}{dt.microsecond//1000:03d}.json"
+            millis = ts[20:23] if ts[19:20] == '.' else '000'
+            filename = f"{event_type}_{ts[0:4]}{ts[5:7]}{ts[8:10]}{ts[11:13]}{ts[14:16]}{ts[17:19]}{millis}.json"
             
             file_path = f"{folder_path}/{filename}"
-            json_content = json.dumps(event_data, ensure_ascii=False)
+            # Keep the UTF-8 bytes; WriteToText's coder passes bytes through as is
+            json_content = orjson.dumps(event_data)
             
-            yield (file_path, json_content)
+            if event_type in TABLE_MAPPING:
+                yield beam.pvalue.TaggedOutput(BIGQUERY_TAG, event_data)
+            
+            yield beam.pvalue.TaggedOutput(GCS_TAG, (file_path, json_content))
             
         except Exception as e:
-            logging.error(f"Error formatting for GCS: {e}, Event: {event_data}")
+            logging.error(f"Error processing event: {e}, Element: {element}")
 
 
 def run_pipeline(argv=None):
@@ -184,6 +189,11 @@ def run_pipeline(argv=None):
     pipeline_options = PipelineOptions(pipeline_args)
     pipeline_options.view_as(StandardOptions).streaming = True
     
+    # Worker harness threads, unless set explicitly on the command line
+    debug_options = pipeline_options.view_as(DebugOptions)
+    if not debug_options.number_of_worker_harness_threads:
+        debug_options.number_of_worker_harness_threads = WORKER_HARNESS_THREADS
+    
     # BigQuery table specifications
     table_specs = {
         'orders': f"{known_args.project}:{known_args.output_dataset}.orders",
@@ -199,59 +209,33 @@ def run_pipeline(argv=None):
             | 'ReadFromPubSub' >> ReadFromPubSub(subscription=known_args.input_subscription)
         )
         
-        # Process events
+        # Process events into tagged BigQuery and GCS outputs
         processed_events = (
             raw_events
-            | 'ProcessEvents' >> beam.ParDo(EventProcessor())
+            | 'ProcessEvents' >> beam.ParDo(EventProcessor()).with_outputs(
+                BIGQUERY_TAG, GCS_TAG)
         )
         
-        # Branch 1: Write to BigQuery
-        bigquery_events = (
-            processed_events
-            | 'FormatForBigQuery' >> beam.ParDo(FormatForBigQuery())
-        )
-        
-        # Write orders to BigQuery
-        orders = (
-            bigquery_events
-            | 'FilterOrders' >> beam.Filter(lambda x: x.get('_table_name') == 'orders')
-            | 'RemoveTableName_Orders' >> beam.Map(lambda x: {k: v for k, v in x.items() if k != '_table_name'})
-            | 'WriteToBigQuery_Orders' >> WriteToBigQuery(
-                table_specs['orders'],
-                write_disposition=beam.io.BigQueryDisposition.WRITE_APPEND,
-                create_disposition=beam.io.BigQueryDisposition.CREATE_NEVER
-            )
-        )
-        
-        # Write inventory to BigQuery
-        inventory = (
-            bigquery_events
-            | 'FilterInventory' >> beam.Filter(lambda x: x.get('_table_name') == 'inventory')
-            | 'RemoveTableName_Inventory' >> beam.Map(lambda x: {k: v for k, v in x.items() if k != '_table_name'})
-            | 'WriteToBigQuery_Inventory' >> WriteToBigQuery(
-                table_specs['inventory'],
-                write_disposition=beam.io.BigQueryDisposition.WRITE_APPEND,
-                create_disposition=beam.io.BigQueryDisposition.CREATE_NEVER
+        # Branch 1: Write to BigQuery, routing each row to its event type's table
+        bigquery_output = (
+            processed_events[BIGQUERY_TAG]
+            | 'WriteToBigQuery' >> WriteToBigQuery(
+                lambda row: table_specs[TABLE_MAPPING[row['event_type']]],
+                **BIGQUERY_WRITE_OPTIONS
             )
         )
         
-        # Write user_activity to BigQuery
-        user_activity = (
-            bigquery_events
-            | 'FilterUserActivity' >> beam.Filter(lambda x: x.get('_table_name') == 'user_activity')
-            | 'RemoveTableName_UserActivity' >> beam.Map(lambda x: {k: v for k, v in x.items() if k != '_table_name'})
-            | 'WriteToBigQuery_UserActivity' >> WriteToBigQuery(
-                table_specs['user_activity'],
-                write_disposition=beam.io.BigQueryDisposition.WRITE_APPEND,
-                create_disposition=beam.io.BigQueryDisposition.CREATE_NEVER
-            )
+        # Rows rejected with a non-transient error are dropped; log them
+        failed_rows = (
+            bigquery_output.failed_rows_with_errors
+            | 'LogFailedBigQueryRows' >> beam.Map(
+                lambda failure: logging.error(f"Failed to insert BigQuery row: {failure}"))
         )
         
         # Branch 2: Write to GCS
         gcs_events = (
-            processed_events
-            | 'FormatForGCS' >> beam.ParDo(FormatForGCS())
-            | 'FormatJSONForGCS' >> beam.Map(lambda x: x[1])  # Extract JSON content
+            processed_events[GCS_TAG]
+            | 'FormatJSONForGCS' >> beam.Map(itemgetter(1))  # Extract JSON content
         )
         
         # Write to GCS with windowing for streaming
@@ -265,8 +249,9 @@ def run_pipeline(argv=None):
             windowed_gcs_events
             | 'WriteToGCS' >> WriteToText(
                 f"{known_args.output_gcs_prefix}/output",
-                file_name_suffix='.json',
-                num_shards=1
+                file_name_suffix='.json.gz',
+                num_shards=0,  # Let the runner pick the shard count per window
+                compression_type=CompressionTypes.GZIP
             )
         )
 